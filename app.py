@@ -1,28 +1,318 @@
 import os
 import re
 import requests
-from yt_dlp import YoutubeDL
-from mutagen.mp4 import MP4, MP4Cover
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from pathlib import Path
 import argparse
+import functools
+import hashlib
 import json
+import logging
+import logging.handlers
+import sqlite3
+import shutil
+import struct
+import sys
+import tempfile
 import time
+import threading
+from operator import itemgetter
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 from urllib.parse import urlparse, parse_qs
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
-# Optional imports for Spotify
+logger = logging.getLogger('tuneharvester')
+
+# Largest cover art we are willing to hold in memory
+MAX_THUMBNAIL_SIZE = 2 * 1024 * 1024
+
+# Title parsing patterns
+_TRAILING_PAREN = re.compile(r'\s*\([^)]*\)\s*$')
+_TRAILING_BRACKET = re.compile(r'\s*\[[^\]]*\]\s*$')
+_TITLE_PATTERN = re.compile(
+    r'^(?:([^-]+)-\s*(.+)'    # Artist - Title
+    r'|([^•]+)•\s*(.+)'       # Artist • Title
+    r'|([^:]+):\s*(.+)'       # Artist: Title
+    r'|(.+?)\s*-\s*(.+))$'    # Artist - Title (more flexible)
+)
+_ARTIST_SEP = re.compile(
+    r'(?:,|\s+feat\.?\s+|\s+ft\.?\s+|\s+&\s+|\s+x\s+|\s+con\s+)',
+    re.IGNORECASE
+)
+_BAD_CHARS = re.compile(r'[<>:"/\\|?*]')
+
+# Query normalization and date patterns
+_PUNCTUATION = re.compile(r'[^\w\s]')
+_WS_COLLAPSE = re.compile(r'\s+')
+_YEAR = re.compile(r'\d{4}')
+
+_get_name = itemgetter('name')
+
+# Metadata defaults, copied for every track
+_DEFAULT_METADATA = {
+    'title': 'Unknown Title',
+    'artist': 'Unknown Artist',
+    'artists': ('Unknown Artist',),
+    'album': 'Unknown Album',
+    'year': '',
+    'source': 'combined'
+}
+_METADATA_FIELDS = ('title', 'artist', 'artists', 'album', 'year')
+_YOUTUBE_METADATA_FIELDS = ('title', 'artist', 'artists')
+
+# Spotify playlist track fields we actually read
+SPOTIFY_TRACK_FIELDS = 'items(track(name,artists(name),album(name,release_date))),total'
+
+# Optional fast JSON parser
 try:
-    import spotipy
-    from spotipy.oauth2 import SpotifyClientCredentials
-    SPOTIPY_AVAILABLE = True
+    import orjson
+    ORJSON_AVAILABLE = True
 except ImportError:
-    SPOTIPY_AVAILABLE = False
+    ORJSON_AVAILABLE = False
+
+def _loads(response):
+    """Parse a JSON response body"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(response.content)
+    return response.json()
+
+def disk_cache(ttl):
+    """
+    Cache method results in memory and in the downloader's SQLite metadata cache
+    
+    A None result means the lookup failed and is not cached, so it is
+    retried on the next call.
+    """
+    def decorator(func):
+        memory = {}
+        
+        @functools.wraps(func)
+        def wrapper(self, *args):
+            key = hashlib.blake2b(
+                json.dumps([func.__name__, *args]).encode('utf-8'),
+                digest_size=16
+            ).hexdigest()
+            
+            if key in memory:
+                return memory[key]
+            
+            with self._meta_lock:
+                row = self._meta_db.execute(
+                    "SELECT value, ts FROM cache WHERE key = ?", (key,)
+                ).fetchone()
+            
+            if row and time.time() - row[1] < ttl:
+                memory[key] = result = json.loads(row[0])
+                return result
+            
+            result = func(self, *args)
+            
+            # Don't cache failed lookups
+            if result is not None:
+                memory[key] = result
+                with self._meta_lock:
+                    self._meta_db.execute(
+                        "INSERT OR REPLACE INTO cache (key, value, ts) VALUES (?, ?, ?)",
+                        (key, json.dumps(result), int(time.time()))
+                    )
+                    self._meta_db.commit()
+            
+            return result
+        return wrapper
+    return decorator
+
+@functools.lru_cache(maxsize=4096)
+def _detect_input_type(input_str):
+    """Detect input type"""
+    if input_str.endswith('.txt') and os.path.exists(input_str):
+        return 'file'
+    
+    if 'youtube.com' in input_str and ('playlist' in input_str or 'list=' in input_str):
+        return 'youtube'
+    elif 'youtu.be' in input_str:
+        return 'youtube'
+    
+    if 'spotify.com' in input_str and 'playlist' in input_str:
+        return 'spotify'
+    
+    return 'search'
+
+def _drop_page_cache(path):
+    """
+    Advise the kernel that the cached pages of path are no longer needed
+    
+    Only clean pages can be dropped, so the freshly written file is flushed
+    to disk first.
+    """
+    if not hasattr(os, 'posix_fadvise'):
+        return
+    
+    try:
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            os.fdatasync(fd)
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        finally:
+            os.close(fd)
+    except OSError:
+        pass
+
+@functools.lru_cache(maxsize=1024)
+def _join_artists(artists):
+    """Join an artists tuple for display, reusing the string for repeats"""
+    return ', '.join(artists)
+
+def _norm_q(s):
+    """Normalize a query so equivalent searches share one lookup"""
+    return _WS_COLLAPSE.sub(' ', _PUNCTUATION.sub('', s.lower())).strip()
+
+# Audio file extensions yt-dlp may produce for our format selection
+_AUDIO_EXTENSIONS = ('.m4a', '.mp4', '.aac', '.webm')
+
+# iTunes metadata atoms
+_TAG_PADDING = 64 * 1024
+_ATOM_TYPE_UTF8 = 1
+_ATOM_TYPE_JPEG = 13
+
+def _iter_atoms(f, start, end):
+    """Yield (offset, size, fourcc) for the MP4 atoms between start and end"""
+    offset = start
+    while offset + 8 <= end:
+        f.seek(offset)
+        size, fourcc = struct.unpack('>I4s', f.read(8))
+        
+        # 64-bit, open-ended or corrupt atom: stop here
+        if size < 8 or offset + size > end:
+            return
+        
+        yield offset, size, fourcc
+        offset += size
+
+def _find_atom(f, start, end, fourcc):
+    """Find the first child atom named fourcc between start and end"""
+    for offset, size, name in _iter_atoms(f, start, end):
+        if name == fourcc:
+            return offset, size
+    return None
+
+def _render_item_atom(fourcc, data_type, payload):
+    """
+    Render an ilst item atom holding a single data atom
+    
+    Returns the headers and the payload as separate chunks so large
+    payloads (cover art) are written as-is instead of being copied.
+    """
+    return [
+        struct.pack('>I4s', 24 + len(payload), fourcc),
+        struct.pack('>I4sII', 16 + len(payload), b'data', data_type, 0),
+        payload
+    ]
+
+def _write_ilst(path, tags, cover_bytes=None):
+    """
+    Patch moov/udta/meta/ilst in place, using the free atom after it as room
+    
+    Nothing outside the ilst + free region is touched, so chunk offsets stay
+    valid. Returns True when the tags were written or already matched, and
+    False without modifying the file when there is no ilst yet or the new
+    tags don't fit, the caller then falls back to mutagen.
+    """
+    items = {}
+    for key, value in tags.items():
+        fourcc = key.encode('latin-1')
+        items[fourcc] = _render_item_atom(fourcc, _ATOM_TYPE_UTF8, str(value).encode('utf-8'))
+    
+    if cover_bytes:
+        items[b'covr'] = _render_item_atom(b'covr', _ATOM_TYPE_JPEG, cover_bytes)
+    
+    with open(path, 'r+b') as f:
+        file_size = os.fstat(f.fileno()).st_size
+        
+        moov = _find_atom(f, 0, file_size, b'moov')
+        udta = moov and _find_atom(f, moov[0] + 8, moov[0] + moov[1], b'udta')
+        meta = udta and _find_atom(f, udta[0] + 8, udta[0] + udta[1], b'meta')
+        if not meta:
+            return False
+        
+        # meta is a full atom: version and flags come before its children
+        children = list(_iter_atoms(f, meta[0] + 12, meta[0] + meta[1]))
+        ilst_index = next((i for i, child in enumerate(children) if child[2] == b'ilst'), None)
+        if ilst_index is None:
+            return False
+        
+        ilst_offset, ilst_size, _ = children[ilst_index]
+        
+        # Room for the new ilst: the old one plus the free atoms right after it
+        available = ilst_size
+        for offset, size, name in children[ilst_index + 1:]:
+            if name != b'free':
+                break
+            available += size
+        
+        # Keep existing items we are not replacing
+        kept = []
+        current = {}
+        for offset, size, name in _iter_atoms(f, ilst_offset + 8, ilst_offset + ilst_size):
+            f.seek(offset)
+            if name in items:
+                current.setdefault(name, []).append(f.read(size))
+            else:
+                kept.append(f.read(size))
+        
+        # Tags are already up to date (e.g. re-run of a playlist): nothing to write
+        if all(current.get(name) == [b''.join(item)] for name, item in items.items()):
+            return True
+        
+        chunks = kept + [chunk for item in items.values() for chunk in item]
+        new_size = 8 + sum(map(len, chunks))
+        
+        padding = available - new_size
+        if padding < 0 or 0 < padding < 8:
+            return False
+        
+        f.seek(ilst_offset)
+        f.write(struct.pack('>I4s', new_size, b'ilst'))
+        f.writelines(chunks)
+        
+        # The content of a free atom is ignored, only its header is needed
+        if padding:
+            f.write(struct.pack('>I4s', padding, b'free'))
+    
+    return True
+
+class TokenBucket:
+    """
+    Thread-safe token bucket rate limiter
+    """
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+    
+    def acquire(self):
+        """Take a token, blocking only while the bucket is empty"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                
+                wait = (1 - self.tokens) / self.rate
+            
+            time.sleep(wait)
 
 class MusicDownloader:
-    def __init__(self, download_path=None):
+    def __init__(self, download_path=None, workers=4, remote_library=False):
         """
         Initialize the music downloader
         """
@@ -33,73 +323,159 @@ class MusicDownloader:
         
         self.download_path.mkdir(parents=True, exist_ok=True)
         
+        # Library on a network mount (NFS, SMB, WebDAV...)
+        self.remote_library = remote_library
+        
+        # Parallel playlist downloads
+        self.workers = max(1, workers)
+        self._local = threading.local()
+        
+        # Rate limits (requests per second)
+        self._yt_bucket = TokenBucket(rate=2, burst=4)
+        self._lastfm_bucket = TokenBucket(rate=5, burst=10)
+        
+        # Background lookups for upcoming playlist tracks
+        self.prefetch_window = 4
+        self._prefetch_pool = ThreadPoolExecutor(max_workers=4)
+        self._prefetch = {}
+        self._prefetch_lock = threading.Lock()
+        
+        # Output files being written, so two queries never download to the same file
+        self._reserved = {}
+        self._reserved_lock = threading.Lock()
+        
+        # Final metadata by normalized query, shared between workers
+        self._meta_memo = {}
+        self._meta_memo_lock = threading.Lock()
+        
+        # Shared keep-alive HTTP session for Spotify, Last.fm and thumbnails
+        self.http = requests.Session()
+        self.http.headers.update({'User-Agent': 'TuneHarvester/1.0'})
+        adapter = HTTPAdapter(
+            pool_connections=8,
+            pool_maxsize=32,
+            max_retries=Retry(
+                total=3,
+                backoff_factor=0.3,
+                status_forcelist=[429, 500, 502, 503, 504]
+            )
+        )
+        self.http.mount('http://', adapter)
+        self.http.mount('https://', adapter)
+        
         # Last.fm API Key (from .env)
         self.lastfm_api_key = os.getenv('LASTFM_API_KEY')
         if not self.lastfm_api_key:
-            print("⚠️ LASTFM_API_KEY not found in .env")
-            print("📋 Get one at: https://www.last.fm/api/account/create")
+            logger.warning("⚠️ LASTFM_API_KEY not found in .env")
+            logger.info("📋 Get one at: https://www.last.fm/api/account/create")
         
         self.lastfm_base_url = "http://ws.audioscrobbler.com/2.0/"
         
+        # Persistent cache (Last.fm lookups and resolved tracks)
+        self._meta_lock = threading.Lock()
+        self._meta_db = sqlite3.connect(
+            self.download_path / '.tuneharvester.sqlite',
+            check_same_thread=False
+        )
+        self._meta_db.execute(
+            "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value BLOB, ts INTEGER)"
+        )
+        self._meta_db.execute(
+            "CREATE TABLE IF NOT EXISTS resolved (key TEXT PRIMARY KEY, yt_url TEXT, yt_title TEXT, "
+            "title TEXT, artist TEXT, album TEXT, year TEXT, artists TEXT, thumb_url TEXT)"
+        )
+        self._meta_db.commit()
+        self._resolved_pending = []
+        
         # Spotify client
         self.spotify_client = None
         self.init_spotify_client()
+        
+        # Warm up connections in the background before the first track
+        threading.Thread(target=self._prime_connections, daemon=True).start()
+    
+    def _prime_connections(self, hosts=None):
+        """
+        Open keep-alive connections to the hosts the shared session will use
+        
+        yt-dlp uses its own HTTP stack, so only the Last.fm, thumbnail and
+        Spotify hosts are primed.
+        """
+        if hosts is None:
+            hosts = [self.lastfm_base_url, 'https://i.ytimg.com']
+            if self.spotify_client:
+                hosts.append('https://api.spotify.com')
+        
+        for host in hosts:
+            try:
+                self.http.head(host, timeout=2)
+            except requests.RequestException:
+                pass
     
     def init_spotify_client(self):
         """
         Initialize Spotify client using credentials from .env
         """
-        if not SPOTIPY_AVAILABLE:
-            print("⚠️ spotipy is not installed. Install with: pip install spotipy")
+        # Get credentials from .env file
+        client_id = os.getenv('SPOTIFY_CLIENT_ID')
+        client_secret = os.getenv('SPOTIFY_CLIENT_SECRET')
+        
+        if not client_id or not client_secret:
+            logger.warning("⚠️ Spotify credentials not found in .env")
+            logger.info("💡 Configure in .env:")
+            logger.info("   SPOTIFY_CLIENT_ID=your_client_id")
+            logger.info("   SPOTIFY_CLIENT_SECRET=your_client_secret")
+            logger.info("📋 Get them at: https://developer.spotify.com/dashboard/")
+            self.spotify_client = None
+            return
+        
+        # Optional import, only loaded when credentials are configured
+        try:
+            import spotipy
+        except ImportError:
+            logger.warning("⚠️ spotipy is not installed. Install with: pip install spotipy")
             return
         
         try:
-            # Get credentials from .env file
-            client_id = os.getenv('SPOTIFY_CLIENT_ID')
-            client_secret = os.getenv('SPOTIFY_CLIENT_SECRET')
-            
-            if not client_id or not client_secret:
-                print("⚠️ Spotify credentials not found in .env")
-                print("💡 Configure in .env:")
-                print("   SPOTIFY_CLIENT_ID=your_client_id")
-                print("   SPOTIFY_CLIENT_SECRET=your_client_secret")
-                print("📋 Get them at: https://developer.spotify.com/dashboard/")
-                self.spotify_client = None
-                return
-            
             # Use credentials from .env
             if self._try_spotify_credentials(client_id, client_secret):
-                print("✅ Spotify client initialized with .env credentials")
+                logger.info("✅ Spotify client initialized with .env credentials")
             else:
-                print("❌ Invalid .env credentials")
+                logger.error("❌ Invalid .env credentials")
                 self.spotify_client = None
                 
         except Exception as e:
-            print(f"❌ Error initializing Spotify: {e}")
+            logger.error("❌ Error initializing Spotify: %s", e)
             self.spotify_client = None
     
     def _try_spotify_credentials(self, client_id, client_secret):
         """
         Test specific Spotify credentials
         """
+        import spotipy
+        from spotipy.oauth2 import SpotifyClientCredentials
+        
         try:
+            # Share the pooled HTTP session with the Spotify API calls
             client_credentials_manager = SpotifyClientCredentials(
                 client_id=client_id,
-                client_secret=client_secret
+                client_secret=client_secret,
+                requests_session=self.http
             )
             
             spotify_client = spotipy.Spotify(
-                client_credentials_manager=client_credentials_manager
+                client_credentials_manager=client_credentials_manager,
+                requests_session=self.http
             )
             
-            # Test connection
-            test_result = spotify_client.search(q="test", type="track", limit=1)
-            if test_result:
+            # Validate credentials with the token request the client needs anyway
+            access_token = client_credentials_manager.get_access_token(as_dict=False)
+            if access_token:
                 self.spotify_client = spotify_client
                 return True
                 
         except Exception as e:
-            print(f"⚠️ Error with credentials: {e}")
+            logger.warning("⚠️ Error with credentials: %s", e)
         
         return False
     
@@ -108,60 +484,72 @@ class MusicDownloader:
         Extract playlist using official Spotify API
         """
         if not self.spotify_client:
-            print("❌ Spotify client not available")
+            logger.error("❌ Spotify client not available")
             return None
         
         try:
             # Extract playlist ID
             playlist_id = spotify_url.split('/playlist/')[1].split('?')[0]
             
-            print(f"🔍 Extracting playlist with Spotify API...")
-            print(f"🆔 Playlist ID: {playlist_id}")
+            logger.info("🔍 Extracting playlist with Spotify API...")
+            logger.info("🆔 Playlist ID: %s", playlist_id)
             
-            # Get playlist information
-            playlist_info = self.spotify_client.playlist(playlist_id)
+            # Get playlist information together with the first page of tracks,
+            # requesting only the fields we use
+            playlist_info = self.spotify_client.playlist(
+                playlist_id,
+                fields=f"name,tracks({SPOTIFY_TRACK_FIELDS})"
+            )
             playlist_name = playlist_info.get('name', 'Unknown Playlist')
             
-            print(f"📋 Playlist found: {playlist_name}")
+            logger.info("📋 Playlist found: %s", playlist_name)
             
-            tracks = []
-            results = self.spotify_client.playlist_tracks(playlist_id)
+            # The first page tells us the total, the rest are fetched concurrently
+            first_page = playlist_info['tracks']
+            total = first_page['total']
             
-            # Process all pages of the playlist
-            while results:
-                for item in results['items']:
-                    track = item.get('track')
-                    if track and track.get('name') and track.get('artists'):
-                        track_name = track['name']
-                        artists = [artist['name'] for artist in track.get('artists', [])]
-                        album = track.get('album', {}).get('name', '')
-                        release_date = track.get('album', {}).get('release_date', '')
-                        
-                        if artists:
-                            query = f"{' '.join(artists)} {track_name}"
-                            tracks.append({
-                                'title': track_name,
-                                'artist': ', '.join(artists),
-                                'artists': artists,
-                                'album': album,
-                                'year': release_date[:4] if release_date else '',
-                                'query': query,
-                                'source': 'spotify_api'
-                            })
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                pages = list(executor.map(
+                    lambda offset: self.spotify_client.playlist_tracks(
+                        playlist_id,
+                        fields=SPOTIFY_TRACK_FIELDS,
+                        limit=100,
+                        offset=offset
+                    ),
+                    range(len(first_page['items']), total, 100)
+                ))
+            
+            all_items = [item for page in [first_page] + pages for item in page['items']]
+            
+            def _mk_track(track):
+                artists = list(map(_get_name, track['artists']))
+                album = track.get('album') or {}
+                release_date = album.get('release_date', '')
                 
-                # Get next page if exists
-                if results['next']:
-                    results = self.spotify_client.next(results)
-                else:
-                    break
+                return {
+                    'title': track['name'],
+                    'artist': ', '.join(artists),
+                    'artists': artists,
+                    'album': album.get('name', ''),
+                    'year': release_date[:4] if release_date else '',
+                    'query': f"{' '.join(artists)} {track['name']}",
+                    'source': 'spotify_api'
+                }
+            
+            tracks = [
+                _mk_track(track)
+                for item in all_items
+                if (track := item.get('track')) and track.get('name') and track.get('artists')
+            ]
             
-            print(f"✅ Extracted {len(tracks)} tracks with Spotify API")
+            logger.info("✅ Extracted %s tracks with Spotify API", len(tracks))
             return tracks
             
         except Exception as e:
-            print(f"❌ Error with Spotify API: {e}")
+            logger.error("❌ Error with Spotify API: %s", e)
             return None
     
+    @disk_cache(ttl=30 * 86400)
     def search_lastfm_track(self, query):
         """
         Search for track information on Last.fm
@@ -175,10 +563,11 @@ class MusicDownloader:
                 'limit': 1
             }
             
-            response = requests.get(self.lastfm_base_url, params=params, timeout=10)
+            self._lastfm_bucket.acquire()
+            response = self.http.get(self.lastfm_base_url, params=params, timeout=10)
             
             if response.status_code == 200:
-                data = response.json()
+                data = _loads(response)
                 
                 if 'results' in data and 'trackmatches' in data['results']:
                     tracks = data['results']['trackmatches']['track']
@@ -187,7 +576,7 @@ class MusicDownloader:
                         track = tracks[0] if isinstance(tracks, list) else tracks
                         
                         # Get additional track information
-                        track_info = self.get_lastfm_track_info(track['artist'], track['name'])
+                        track_info = self.get_lastfm_track_info(track['artist'], track['name']) or {}
                         
                         return {
                             'title': track['name'],
@@ -199,10 +588,11 @@ class MusicDownloader:
                         }
             
         except Exception as e:
-            print(f"⚠️ Error searching Last.fm: {e}")
+            logger.warning("⚠️ Error searching Last.fm for '%s': %s", query, e)
         
         return None
     
+    @disk_cache(ttl=30 * 86400)
     def get_lastfm_track_info(self, artist, track):
         """
         Get additional track information from Last.fm
@@ -216,10 +606,11 @@ class MusicDownloader:
                 'format': 'json'
             }
             
-            response = requests.get(self.lastfm_base_url, params=params, timeout=10)
+            self._lastfm_bucket.acquire()
+            response = self.http.get(self.lastfm_base_url, params=params, timeout=10)
             
             if response.status_code == 200:
-                data = response.json()
+                data = _loads(response)
                 
                 if 'track' in data:
                     track_data = data['track']
@@ -238,11 +629,12 @@ class MusicDownloader:
                         'year': year
                     }
             
-        except Exception as e:
+        except Exception:
             pass
         
-        return {'album': 'Unknown Album', 'year': ''}
+        return None
     
+    @disk_cache(ttl=30 * 86400)
     def search_lastfm_album_info(self, artist, album):
         """
         Search for album information on Last.fm
@@ -256,10 +648,11 @@ class MusicDownloader:
                 'format': 'json'
             }
             
-            response = requests.get(self.lastfm_base_url, params=params, timeout=10)
+            self._lastfm_bucket.acquire()
+            response = self.http.get(self.lastfm_base_url, params=params, timeout=10)
             
             if response.status_code == 200:
-                data = response.json()
+                data = _loads(response)
                 
                 if 'album' in data:
                     album_data = data['album']
@@ -269,7 +662,7 @@ class MusicDownloader:
                     if 'wiki' in album_data and 'published' in album_data['wiki']:
                         published = album_data['wiki']['published']
                         # Extract year from date (format: "01 Jan 2020, 00:00")
-                        year_match = re.search(r'\d{4}', published)
+                        year_match = _YEAR.search(published)
                         if year_match:
                             year = year_match.group()
                     
@@ -278,7 +671,7 @@ class MusicDownloader:
         except Exception:
             pass
         
-        return {'year': ''}
+        return None
     
     def extract_metadata_from_youtube_title(self, title):
         """
@@ -286,39 +679,30 @@ class MusicDownloader:
         """
         try:
             # Clean the title
-            clean_title = re.sub(r'\s*\([^)]*\)\s*$', '', title)
-            clean_title = re.sub(r'\s*\[[^\]]*\]\s*$', '', clean_title)
-            
-            # Patterns to extract artist and title
-            patterns = [
-                r'^([^-]+)-\s*(.+)$',  # Artist - Title
-                r'^([^•]+)•\s*(.+)$',  # Artist • Title
-                r'^([^:]+):\s*(.+)$',  # Artist: Title
-                r'^(.+?)\s*-\s*(.+)$', # Artist - Title (more flexible)
-            ]
+            clean_title = _TRAILING_PAREN.sub('', title)
+            clean_title = _TRAILING_BRACKET.sub('', clean_title)
             
-            for pattern in patterns:
-                match = re.match(pattern, clean_title.strip())
-                if match:
-                    raw_artists = match.group(1).strip()
-                    song_title = match.group(2).strip()
-                    
-                    # Separate multiple artists
-                    artists = []
-                    artist_separators = r'(?:,|\s+feat\.?\s+|\s+ft\.?\s+|\s+&\s+|\s+x\s+|\s+con\s+)'
-                    artist_parts = re.split(artist_separators, raw_artists, flags=re.IGNORECASE)
-                    
-                    for artist in artist_parts:
-                        artist = artist.strip()
-                        if artist:
-                            artists.append(artist)
-                    
-                    return {
-                        'title': song_title,
-                        'artist': ', '.join(artists),
-                        'artists': artists,
-                        'source': 'youtube'
-                    }
+            # Alternatives are tried in priority order, so one scan is enough
+            match = _TITLE_PATTERN.match(clean_title.strip())
+            if match:
+                groups = match.groups()
+                i = next(i for i in range(0, len(groups), 2) if groups[i] is not None)
+                raw_artists = groups[i].strip()
+                song_title = groups[i + 1].strip()
+                
+                # Separate multiple artists
+                artists = []
+                for artist in _ARTIST_SEP.split(raw_artists):
+                    artist = artist.strip()
+                    if artist:
+                        artists.append(artist)
+                
+                return {
+                    'title': song_title,
+                    'artist': ', '.join(artists),
+                    'artists': artists,
+                    'source': 'youtube'
+                }
             
             # If can't parse, return full title
             return {
@@ -329,7 +713,7 @@ class MusicDownloader:
             }
             
         except Exception as e:
-            print(f"⚠️ Error extracting metadata from title: {e}")
+            logger.warning("⚠️ Error extracting metadata from title: %s", e)
             return None
     
     def get_best_metadata(self, spotify_metadata, lastfm_metadata, youtube_metadata, query):
@@ -337,47 +721,28 @@ class MusicDownloader:
         Combine the best metadata from all sources
         """
         # Priority: Spotify > Last.fm > YouTube
-        final_metadata = {
-            'title': 'Unknown Title',
-            'artist': 'Unknown Artist',
-            'artists': ['Unknown Artist'],
-            'album': 'Unknown Album',
-            'year': '',
-            'source': 'combined'
-        }
+        final_metadata = _DEFAULT_METADATA.copy()
         
         # If we have Spotify data (most reliable)
         if spotify_metadata:
-            final_metadata.update({
-                'title': spotify_metadata.get('title', final_metadata['title']),
-                'artist': spotify_metadata.get('artist', final_metadata['artist']),
-                'artists': spotify_metadata.get('artists', final_metadata['artists']),
-                'album': spotify_metadata.get('album', final_metadata['album']),
-                'year': spotify_metadata.get('year', final_metadata['year']),
-                'source': 'spotify'
-            })
-            return final_metadata
+            for key in _METADATA_FIELDS:
+                if value := spotify_metadata.get(key):
+                    final_metadata[key] = value
+            final_metadata['source'] = 'spotify'
         
         # If no Spotify, use Last.fm
-        if lastfm_metadata:
-            final_metadata.update({
-                'title': lastfm_metadata.get('title', final_metadata['title']),
-                'artist': lastfm_metadata.get('artist', final_metadata['artist']),
-                'artists': lastfm_metadata.get('artists', final_metadata['artists']),
-                'album': lastfm_metadata.get('album', final_metadata['album']),
-                'year': lastfm_metadata.get('year', final_metadata['year']),
-                'source': 'lastfm'
-            })
-            return final_metadata
+        elif lastfm_metadata:
+            for key in _METADATA_FIELDS:
+                if value := lastfm_metadata.get(key):
+                    final_metadata[key] = value
+            final_metadata['source'] = 'lastfm'
         
         # As last resort, use YouTube
-        if youtube_metadata:
-            final_metadata.update({
-                'title': youtube_metadata.get('title', final_metadata['title']),
-                'artist': youtube_metadata.get('artist', final_metadata['artist']),
-                'artists': youtube_metadata.get('artists', final_metadata['artists']),
-                'source': 'youtube'
-            })
+        elif youtube_metadata:
+            for key in _YOUTUBE_METADATA_FIELDS:
+                if value := youtube_metadata.get(key):
+                    final_metadata[key] = value
+            final_metadata['source'] = 'youtube'
             
             # Try to get album from Last.fm with YouTube data
             if final_metadata['artist'] != 'Unknown Artist':
@@ -385,22 +750,26 @@ class MusicDownloader:
                     final_metadata['artist'], 
                     final_metadata['title']
                 )
-                if album_info.get('year'):
+                if album_info and album_info.get('year'):
                     final_metadata['year'] = album_info['year']
         
+        # Only the shared default artists are a tuple
+        if isinstance(final_metadata['artists'], tuple):
+            final_metadata['artists'] = list(final_metadata['artists'])
+        
         return final_metadata
     
     def create_playlist_file_from_spotify(self, spotify_url, filename=None):
         """
         Create playlist file automatically from Spotify
         """
-        print("🎵 Extracting tracks from Spotify...")
+        logger.info("🎵 Extracting tracks from Spotify...")
         
         # Try with Spotify API first
         tracks = self.extract_spotify_playlist_with_api(spotify_url)
         
         if not tracks:
-            print("❌ Could not extract with Spotify API")
+            logger.error("❌ Could not extract with Spotify API")
             return self.create_manual_playlist_template(spotify_url, filename)
         
         # Generate filename
@@ -424,21 +793,21 @@ class MusicDownloader:
                 for track in tracks:
                     f.write(f"{track['query']}\n")
             
-            print(f"✅ File created: {file_path}")
-            print(f"📋 Tracks extracted: {len(tracks)}")
+            logger.info("✅ File created: %s", file_path)
+            logger.info("📋 Tracks extracted: %s", len(tracks))
             
             # Preview
-            print("\n🎵 Preview:")
+            logger.info("\n🎵 Preview:")
             for i, track in enumerate(tracks[:5], 1):
-                print(f"   {i}. {track['query']}")
+                logger.info("   %s. %s", i, track['query'])
             
             if len(tracks) > 5:
-                print(f"   ... and {len(tracks) - 5} more")
+                logger.info("   ... and %s more", len(tracks) - 5)
             
             return file_path
             
         except Exception as e:
-            print(f"❌ Error creating file: {e}")
+            logger.error("❌ Error creating file: %s", e)
             return None
     
     def create_manual_playlist_template(self, spotify_url, custom_name=None):
@@ -469,12 +838,12 @@ class MusicDownloader:
             f.write("# Quevedo Bzrp Music Sessions 52\n\n")
             f.write("# Add your tracks here:\n")
         
-        print(f"📄 Manual template created: {template_file}")
+        logger.info("📄 Manual template created: %s", template_file)
         return template_file
     
     def sanitize_filename(self, filename):
         """Clean filename"""
-        return re.sub(r'[<>:"/\\|?*]', '', filename)
+        return _BAD_CHARS.sub('', filename)
     
     def create_filename_from_metadata(self, metadata):
         """Create filename from metadata"""
@@ -499,93 +868,83 @@ class MusicDownloader:
         
         return self.sanitize_filename(filename)
     
-    def download_thumbnail(self, thumbnail_url, file_path):
-        """Download video thumbnail"""
+    def download_thumbnail(self, thumbnail_url):
+        """Download video thumbnail into memory"""
         try:
-            response = requests.get(thumbnail_url, timeout=10)
-            if response.status_code == 200:
-                thumbnail_path = file_path.parent / f"{file_path.stem}_thumb.jpg"
-                with open(thumbnail_path, 'wb') as f:
-                    f.write(response.content)
-                return thumbnail_path
+            with self.http.get(thumbnail_url, stream=True, timeout=10) as response:
+                if response.status_code == 200:
+                    content_length = int(response.headers.get('Content-Length') or 0)
+                    if content_length > MAX_THUMBNAIL_SIZE:
+                        logger.warning("⚠️ Thumbnail too large (%s bytes), skipping", content_length)
+                        return None
+                    
+                    # Read in large chunks, stopping as soon as the cap is exceeded
+                    chunks = []
+                    size = 0
+                    for chunk in response.iter_content(chunk_size=128 * 1024):
+                        size += len(chunk)
+                        if size > MAX_THUMBNAIL_SIZE:
+                            logger.warning("⚠️ Thumbnail too large, skipping")
+                            return None
+                        chunks.append(chunk)
+                    
+                    return b''.join(chunks)
         except Exception as e:
-            print(f"⚠️ Error downloading thumbnail: {e}")
+            logger.warning("⚠️ Error downloading thumbnail: %s", e)
         return None
     
+    def iter_tracks_from_file(self, file_path):
+        """Yield tracks from text file as lines are read"""
+        with open(file_path, 'r', encoding='utf-8', buffering=1 << 20) as f:
+            for raw_line in f:
+                line = raw_line.strip()
+                if line and not line.startswith('#'):
+                    yield {'title': line, 'query': line, 'artist': ''}
+    
     def load_tracks_from_file(self, file_path):
         """Load tracks from text file"""
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-            
-            tracks = []
-            for line in lines:
-                line = line.strip()
-                if line and not line.startswith('#'):
-                    tracks.append({
-                        'title': line,
-                        'query': line,
-                        'artist': '',
-                    })
-            
-            return tracks
+            return list(self.iter_tracks_from_file(file_path))
         except Exception as e:
-            print(f"❌ Error reading file: {e}")
+            logger.error("❌ Error reading file: %s", e)
             return []
     
     def extract_youtube_playlist_data(self, youtube_url):
         """Extract YouTube playlist"""
         try:
-            ydl_opts = {
-                'quiet': True,
-                'no_warnings': True,
-                'extract_flat': True,
-            }
+            # Reuse this thread's flat-extraction instance
+            self._yt_bucket.acquire()
+            playlist_info = self._get_ydl('search').extract_info(youtube_url, download=False)
             
-            with YoutubeDL(ydl_opts) as ydl:
-                playlist_info = ydl.extract_info(youtube_url, download=False)
-                
-                if 'entries' in playlist_info:
-                    tracks = []
-                    for entry in playlist_info['entries']:
-                        if entry and 'title' in entry:
-                            tracks.append({
-                                'title': entry['title'],
-                                'query': entry['title'],
-                                'url': entry.get('url', ''),
-                                'id': entry.get('id', '')
-                            })
-                    
-                    return tracks
+            if 'entries' in playlist_info:
+                return [
+                    {
+                        'title': entry['title'],
+                        'query': entry['title'],
+                        'url': entry.get('url', ''),
+                        'id': entry.get('id', '')
+                    }
+                    for entry in (playlist_info['entries'] or ())
+                    if entry and 'title' in entry
+                ]
             
         except Exception as e:
-            print(f"❌ Error extracting YouTube playlist: {e}")
+            logger.error("❌ Error extracting YouTube playlist: %s", e)
         
         return []
     
     def detect_input_type(self, input_str):
         """Detect input type"""
-        if input_str.endswith('.txt') and os.path.exists(input_str):
-            return 'file'
-        
-        if 'youtube.com' in input_str and ('playlist' in input_str or 'list=' in input_str):
-            return 'youtube'
-        elif 'youtu.be' in input_str:
-            return 'youtube'
-        
-        if 'spotify.com' in input_str and 'playlist' in input_str:
-            return 'spotify'
-        
-        return 'search'
+        return _detect_input_type(input_str)
     
     def download_playlist_from_source(self, source, custom_folder=None, extract_only=False):
         """Download playlist from different sources"""
         input_type = self.detect_input_type(source)
         
-        print(f"🎵 Detected: {input_type.upper()}")
+        logger.info("🎵 Detected: %s", input_type.upper())
         
         if input_type == 'spotify':
-            print(f"🔍 Extracting Spotify playlist...")
+            logger.info("🔍 Extracting Spotify playlist...")
             
             filename = f"{self.sanitize_filename(custom_folder)}.txt" if custom_folder else None
             playlist_file = self.create_playlist_file_from_spotify(source, filename)
@@ -594,31 +953,44 @@ class MusicDownloader:
                 return []
             
             if extract_only:
-                print(f"\n📄 List extracted to: {playlist_file}")
-                print("💡 To download tracks run:")
-                print(f"   python app.py \"{playlist_file}\" --playlist-name \"{custom_folder or 'My Playlist'}\"")
+                logger.info("\n📄 List extracted to: %s", playlist_file)
+                logger.info("💡 To download tracks run:")
+                logger.info("   python app.py \"%s\" --playlist-name \"%s\"", playlist_file, custom_folder or 'My Playlist')
                 return []
             
             source = str(playlist_file)
             input_type = 'file'
         
-        print(f"🔍 Extracting information...")
+        logger.info("🔍 Extracting information...")
         
         if input_type == 'file':
             tracks = self.load_tracks_from_file(source)
-            print(f"📄 Loading from file: {source}")
+            logger.info("📄 Loading from file: %s", source)
         elif input_type == 'youtube':
             tracks = self.extract_youtube_playlist_data(source)
-            print(f"📺 Extracting YouTube playlist")
+            logger.info("📺 Extracting YouTube playlist")
         else:
-            print("❌ Unrecognized input type")
+            logger.error("❌ Unrecognized input type")
             return []
         
         if not tracks:
-            print("❌ Could not extract tracks")
+            logger.error("❌ Could not extract tracks")
             return []
         
-        print(f"📋 Found {len(tracks)} tracks")
+        logger.info("📋 Found %s tracks", len(tracks))
+        
+        # Skip duplicate tracks
+        seen = set()
+        unique_tracks = []
+        for track in tracks:
+            key = _norm_q(track['query'])
+            if key not in seen:
+                seen.add(key)
+                unique_tracks.append(track)
+        
+        if len(unique_tracks) < len(tracks):
+            logger.info("🔁 Skipping %s duplicate tracks", len(tracks) - len(unique_tracks))
+            tracks = unique_tracks
         
         # Create destination folder
         if custom_folder:
@@ -628,178 +1000,442 @@ class MusicDownloader:
             playlist_folder = self.download_path / playlist_name
         
         playlist_folder.mkdir(parents=True, exist_ok=True)
+        output_dir = str(playlist_folder)
         
-        # Change path temporarily
-        original_path = self.download_path
-        self.download_path = playlist_folder
+        # Files from a previous run, read with a single directory scan
+        existing = {entry.name for entry in os.scandir(output_dir) if entry.is_file()}
         
         downloaded_files = []
         failed_downloads = []
         
-        # Download each track
-        for i, track in enumerate(tracks, 1):
-            print(f"\n📥 Downloading {i}/{len(tracks)}: {track['query']}")
+        # Download tracks in parallel
+        logger.info("\n📥 Downloading %s tracks with %s workers...", len(tracks), self.workers)
+        
+        self._prefetch.clear()
+        self._reserved.clear()
+        
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = {
+                executor.submit(self._download_playlist_track, i, tracks, output_dir, existing): track
+                for i, track in enumerate(tracks)
+            }
             
             try:
-                result = self.download_track(track['query'])
-                if result:
-                    downloaded_files.append(result)
-                    print(f"✅ Completed")
-                else:
-                    failed_downloads.append(track['query'])
-                    print(f"❌ Failed")
-                
-                time.sleep(1)  # Avoid rate limiting
-                
-            except Exception as e:
-                print(f"❌ Error: {e}")
-                failed_downloads.append(track['query'])
+                for i, future in enumerate(as_completed(futures), 1):
+                    query = futures[future]['query']
+                    
+                    try:
+                        result = future.result()
+                        if result:
+                            downloaded_files.append(result)
+                            logger.info("✅ Completed %s/%s: %s", i, len(tracks), query)
+                        else:
+                            failed_downloads.append(query)
+                            logger.error("❌ Failed %s/%s: %s", i, len(tracks), query)
+                        
+                    except Exception as e:
+                        logger.error("❌ Error: %s", e)
+                        failed_downloads.append(query)
+            except BaseException:
+                # On Ctrl-C only let the tracks already in progress finish
+                executor.shutdown(wait=False, cancel_futures=True)
+                self._cancel_prefetch()
+                raise
         
-        # Restore path
-        self.download_path = original_path
+        self.flush_cache()
         
         # Summary
-        print(f"\n📊 SUMMARY:")
-        print(f"✅ Completed: {len(downloaded_files)}")
-        print(f"❌ Failed: {len(failed_downloads)}")
-        print(f"📁 Saved to: {playlist_folder}")
+        logger.info("\n📊 SUMMARY:")
+        logger.info("✅ Completed: %s", len(downloaded_files))
+        logger.log(logging.ERROR if failed_downloads else logging.INFO, "❌ Failed: %s", len(failed_downloads))
+        logger.info("📁 Saved to: %s", playlist_folder)
         
         if failed_downloads:
-            print(f"\n⚠️ Failed tracks:")
+            logger.warning("\n⚠️ Failed tracks:")
             for failed in failed_downloads[:5]:  # Only show first 5
-                print(f"   - {failed}")
+                logger.warning("   - %s", failed)
             if len(failed_downloads) > 5:
-                print(f"   ... and {len(failed_downloads) - 5} more")
+                logger.warning("   ... and %s more", len(failed_downloads) - 5)
         
         return downloaded_files
     
-    def download_track(self, query, custom_filename=None):
-        """Download an individual track"""
+    def _get_ydl(self, kind):
+        """
+        Get this thread's long-lived YoutubeDL instance ('search' or 'download')
+        
+        YoutubeDL is not thread-safe, so each worker keeps its own instances
+        and reuses them for every track instead of paying the startup cost
+        per track.
+        """
+        ydl = getattr(self._local, kind, None)
+        
+        if ydl is None:
+            from yt_dlp import YoutubeDL
+            
+            if kind == 'search':
+                ydl_opts = {
+                    'quiet': True,
+                    'no_warnings': True,
+                    'extract_flat': 'in_playlist',
+                    'skip_download': True,
+                }
+            else:
+                ydl_opts = {
+                    'format': '140/bestaudio[ext=m4a]/bestaudio[acodec*=aac]/bestaudio',
+                    'writeinfojson': False,
+                    'writethumbnail': False,
+                    'quiet': True,
+                    'no_warnings': True,
+                    'progress_hooks': [self._capture_download],
+                    'postprocessor_hooks': [self._capture_download],
+                    # Overlap DASH/HLS fragments and fetch plain files in large ranges
+                    'concurrent_fragment_downloads': 8,
+                    'http_chunk_size': 10 * 1024 * 1024,
+                    'retries': 5,
+                    'fragment_retries': 5,
+                    'socket_timeout': 15,
+                    'buffersize': 256 * 1024,
+                }
+            
+            ydl = YoutubeDL(ydl_opts)
+            setattr(self._local, kind, ydl)
+        
+        return ydl
+    
+    def _capture_download(self, d):
+        """yt-dlp hook: remember the final file of this thread's download"""
+        if d['status'] == 'finished':
+            filename = d.get('filename') or d.get('info_dict', {}).get('filepath')
+            if filename:
+                self._local.downloaded_file = filename
+    
+    def _resolve_query(self, query):
+        """Find the first YouTube result for a query"""
         try:
-            # 1. Search Last.fm first for metadata
-            print(f"🔍 Searching metadata on Last.fm...")
-            lastfm_metadata = self.search_lastfm_track(query)
-            
-            # 2. Search on YouTube
-            print(f"🔍 Searching on YouTube...")
-            ydl_opts_info = {
-                'quiet': True,
-                'no_warnings': True,
-                'extract_flat': False,
-            }
+            self._yt_bucket.acquire()
+            info = self._get_ydl('search').extract_info(f"ytsearch1:{query}", download=False)
             
-            with YoutubeDL(ydl_opts_info) as ydl:
-                search_query = f"ytsearch1:{query}"
-                info = ydl.extract_info(search_query, download=False)
+            if info and info.get('entries'):
+                return info['entries'][0]
                 
-                if 'entries' in info and info['entries']:
-                    video_info = info['entries'][0]
-                    print(f"🎵 Found: {video_info['title']}")
-                    
-                    # 3. Extract metadata from YouTube title
-                    youtube_metadata = self.extract_metadata_from_youtube_title(video_info['title'])
-                    
-                    # 4. Combine best metadata
-                    final_metadata = self.get_best_metadata(None, lastfm_metadata, youtube_metadata, query)
-                    final_metadata['thumbnail'] = video_info.get('thumbnail', '')
-                    
-                    print(f"📋 Metadata: {final_metadata['artist']} - {final_metadata['title']}")
-                    print(f"💿 Album: {final_metadata['album']} ({final_metadata['year']})")
-                    
-                    # 5. Create filename
-                    if custom_filename:
-                        filename = self.sanitize_filename(custom_filename)
-                    else:
-                        filename = self.create_filename_from_metadata(final_metadata)
-                        if not filename:
-                            filename = self.sanitize_filename(video_info['title'])
-                    
-                    # 6. Download audio
-                    print(f"⬇️ Downloading audio...")
-                    ydl_opts_download = {
-                        'format': '140/bestaudio[ext=m4a]/bestaudio[acodec*=aac]/bestaudio',
-                        'outtmpl': str(self.download_path / f'{filename}.%(ext)s'),
-                        'writeinfojson': False,
-                        'writethumbnail': False,
-                        'quiet': True,
-                        'no_warnings': True,
-                    }
-                    
-                    with YoutubeDL(ydl_opts_download) as ydl_download:
-                        ydl_download.download([video_info['webpage_url']])
-                    
-                    # 7. Find downloaded file
-                    downloaded_file = None
-                    for ext in ['m4a', 'aac', 'mp4', 'webm']:
-                        pattern = f"{filename}.{ext}"
-                        matches = list(self.download_path.glob(pattern))
-                        if matches:
-                            downloaded_file = matches[0]
-                            break
-                    
-                    if not downloaded_file:
-                        # Search for recent audio files
-                        audio_extensions = ['*.m4a', '*.aac', '*.mp4', '*.webm']
-                        audio_files = []
-                        for ext in audio_extensions:
-                            audio_files.extend(self.download_path.glob(ext))
-                        
-                        if audio_files:
-                            downloaded_file = max(audio_files, key=lambda f: f.stat().st_mtime)
-                    
-                    # 8. Add metadata and thumbnail
-                    if downloaded_file:
-                        print(f"🏷️ Adding metadata...")
-                        
-                        # Download thumbnail
-                        thumbnail_path = None
-                        if final_metadata.get('thumbnail'):
-                            thumbnail_path = self.download_thumbnail(final_metadata['thumbnail'], downloaded_file)
-                        
-                        # Add metadata to file
-                        if downloaded_file.suffix.lower() in ['.m4a', '.mp4']:
-                            self.add_metadata(downloaded_file, final_metadata, thumbnail_path)
+        except Exception as e:
+            logger.warning("⚠️ Error searching YouTube for '%s': %s", query, e)
+        
+        return None
+    
+    def _resolve_metadata(self, query):
+        """Look up Last.fm metadata and the YouTube result for a query"""
+        # Already resolved on a previous run, download_track reads it from the cache
+        if self._get_resolved(_norm_q(query)):
+            return None
+        
+        return self.search_lastfm_track(query), self._resolve_query(query)
+    
+    def _get_resolved(self, key):
+        """
+        Get a previously downloaded track from the persistent cache
+        
+        Returns a (video_info, metadata) pair or None.
+        """
+        with self._meta_lock:
+            row = self._meta_db.execute(
+                "SELECT yt_url, yt_title, title, artist, album, year, artists, thumb_url "
+                "FROM resolved WHERE key = ?", (key,)
+            ).fetchone()
+        
+        if not row:
+            return None
+        
+        yt_url, yt_title, title, artist, album, year, artists, thumb_url = row
+        
+        video_info = {'url': yt_url, 'title': yt_title}
+        metadata = {
+            'title': title,
+            'artist': artist,
+            'artists': json.loads(artists),
+            'album': album,
+            'year': year,
+            'thumbnail': thumb_url,
+            'source': 'cache'
+        }
+        return video_info, metadata
+    
+    def _store_resolved(self, key, video_info, metadata):
+        """Queue a resolved track for the persistent cache, writing in batches of 50"""
+        row = (
+            key,
+            video_info.get('webpage_url') or video_info['url'],
+            video_info['title'],
+            metadata['title'],
+            metadata['artist'],
+            metadata['album'],
+            metadata['year'],
+            json.dumps(metadata['artists']),
+            metadata.get('thumbnail', '')
+        )
+        
+        with self._meta_lock:
+            self._resolved_pending.append(row)
+            pending = len(self._resolved_pending)
+        
+        if pending >= 50:
+            self.flush_cache()
+    
+    def flush_cache(self):
+        """Write queued resolved tracks to the persistent cache"""
+        with self._meta_lock:
+            if self._resolved_pending:
+                self._meta_db.executemany(
+                    "INSERT OR REPLACE INTO resolved VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    self._resolved_pending
+                )
+                self._meta_db.commit()
+                self._resolved_pending = []
+    
+    def _prefetch_ahead(self, start, tracks):
+        """Start lookups for the next prefetch_window tracks in the background"""
+        with self._prefetch_lock:
+            for j in range(start, min(start + self.prefetch_window, len(tracks))):
+                if j not in self._prefetch:
+                    self._prefetch[j] = self._prefetch_pool.submit(
+                        self._resolve_metadata, tracks[j]['query']
+                    )
+    
+    def _cancel_prefetch(self):
+        """Cancel the lookups that haven't started yet"""
+        with self._prefetch_lock:
+            for future in self._prefetch.values():
+                if future:
+                    future.cancel()
+            self._prefetch.clear()
+    
+    def _download_playlist_track(self, index, tracks, output_dir, existing=None):
+        """Download tracks[index] while the next tracks are looked up"""
+        self._prefetch_ahead(index + 1, tracks)
+        
+        # Leave a None behind so _prefetch_ahead doesn't look up a claimed track
+        with self._prefetch_lock:
+            future = self._prefetch.get(index)
+            self._prefetch[index] = None
+        
+        resolved = None
+        if future:
+            try:
+                resolved = future.result()
+            except Exception:
+                pass  # Fall back to live lookups
+        
+        return self.download_track(tracks[index]['query'], output_dir, resolved=resolved, existing=existing)
+    
+    def download_track(self, query, output_dir, custom_filename=None, resolved=None, existing=None):
+        """
+        Download an individual track into output_dir
+        
+        resolved is an optional (lastfm_metadata, video_info) pair that was
+        already looked up by _resolve_metadata. Tracks downloaded on a
+        previous run are taken from the persistent cache instead.
+        
+        existing is an optional set of file names already in output_dir;
+        tracks whose file is in it are not downloaded again. A query that
+        maps to a file another worker is writing waits for that download.
+        """
+        try:
+            # 1. Search Last.fm first for metadata (unless already known)
+            memo_key = _norm_q(query)
+            final_metadata = self._meta_memo.get(memo_key)
+            cached = self._get_resolved(memo_key)
+            
+            if cached:
+                video_info, final_metadata = cached
+            elif resolved:
+                lastfm_metadata, video_info = resolved
+            else:
+                video_info = None
+                if final_metadata is None:
+                    logger.debug("🔍 Searching metadata on Last.fm: %s", query)
+                    lastfm_metadata = self.search_lastfm_track(query)
+            
+            # 2. Search on YouTube (unless already resolved)
+            if not video_info:
+                logger.debug("🔍 Searching on YouTube: %s", query)
+                video_info = self._resolve_query(query)
+            
+            if not video_info:
+                return None
+            
+            logger.info("🎵 Found for '%s': %s", query, video_info['title'])
+            
+            if final_metadata is None:
+                # 3. Extract metadata from YouTube title
+                youtube_metadata = self.extract_metadata_from_youtube_title(video_info['title'])
+                
+                # 4. Combine best metadata
+                final_metadata = self.get_best_metadata(None, lastfm_metadata, youtube_metadata, query)
+                
+                with self._meta_memo_lock:
+                    self._meta_memo[memo_key] = final_metadata
+            
+            final_metadata = dict(final_metadata)
+            
+            logger.info("📋 Metadata: %s - %s", final_metadata['artist'], final_metadata['title'])
+            logger.info("💿 Album: %s (%s)", final_metadata['album'], final_metadata['year'])
+            
+            # 5. Create filename
+            if custom_filename:
+                filename = self.sanitize_filename(custom_filename)
+            else:
+                filename = self.create_filename_from_metadata(final_metadata)
+                if not filename:
+                    filename = self.sanitize_filename(video_info['title'])
+            
+            # Skip tracks downloaded by a previous run
+            if existing:
+                for ext in _AUDIO_EXTENSIONS:
+                    if filename + ext in existing:
+                        file_path = os.path.join(output_dir, filename + ext)
+                        logger.info("⏭️ Already downloaded: %s", filename + ext)
                         
-                        # Clean temporary thumbnail
-                        if thumbnail_path and thumbnail_path.exists():
-                            thumbnail_path.unlink()
+                        # Only tagged files are cached, others may come from an interrupted run
+                        if not cached:
+                            if ext in ('.m4a', '.mp4'):
+                                thumbnails = video_info.get('thumbnails') or [{}]
+                                final_metadata['thumbnail'] = video_info.get('thumbnail') or thumbnails[-1].get('url', '')
+                                if final_metadata['thumbnail']:
+                                    final_metadata['thumbnail_bytes'] = self.download_thumbnail(final_metadata['thumbnail'])
+                                
+                                self.add_metadata(file_path, final_metadata)
+                            
+                            self._store_resolved(memo_key, video_info, final_metadata)
                         
-                        print(f"✅ Download completed")
-                        return str(downloaded_file)
-                
-                return None
+                        return file_path
+            
+            # Another worker may be writing the same file for a different query
+            target = os.path.join(output_dir, filename)
+            with self._reserved_lock:
+                pending = self._reserved.get(target)
+                if pending is None:
+                    self._reserved[target] = reservation = Future()
+            
+            if pending is not None:
+                logger.info("⏭️ Already being downloaded: %s", filename)
+                return pending.result()
+            
+            downloaded_file = None
+            try:
+                downloaded_file = self._download_audio(target, video_info, final_metadata)
+            finally:
+                reservation.set_result(downloaded_file)
+            
+            if downloaded_file and not cached:
+                self._store_resolved(memo_key, video_info, final_metadata)
+            
+            return downloaded_file
                 
         except Exception as e:
-            print(f"❌ Error downloading: {e}")
+            logger.error("❌ Error downloading '%s': %s", query, e)
             return None
     
-    def add_metadata(self, file_path, metadata, thumbnail_path=None):
+    def _download_audio(self, target, video_info, final_metadata):
+        """Download and tag the audio of video_info as target.<ext>, returning the file"""
+        # 6. Download audio
+        logger.debug("⬇️ Downloading audio: %s", target)
+        ydl_download = self._get_ydl('download')
+        ydl_download.params['outtmpl']['default'] = f'{target}.%(ext)s'
+        self._local.downloaded_file = None
+        
+        # Search results are flat, the full info (with thumbnail) comes from the download
+        self._yt_bucket.acquire()
+        download_info = ydl_download.extract_info(
+            video_info.get('webpage_url') or video_info['url'],
+            download=True
+        )
+        final_metadata['thumbnail'] = (download_info or {}).get('thumbnail', '')
+        
+        # 7. Get downloaded file (reported by the progress hook)
+        downloaded_file = self._local.downloaded_file
+        
+        if not downloaded_file and download_info:
+            downloaded_file = ydl_download.prepare_filename(download_info)
+        
+        # 8. Add metadata and thumbnail
+        if downloaded_file:
+            logger.debug("🏷️ Adding metadata: %s", downloaded_file)
+            
+            # Add metadata and thumbnail to file
+            if os.path.splitext(downloaded_file)[1].lower() in ('.m4a', '.mp4'):
+                if final_metadata.get('thumbnail'):
+                    final_metadata['thumbnail_bytes'] = self.download_thumbnail(final_metadata['thumbnail'])
+                
+                self.add_metadata(downloaded_file, final_metadata)
+            
+            # We won't read the file again, don't let it crowd the page cache
+            _drop_page_cache(downloaded_file)
+            
+            logger.debug("✅ Download completed: %s", downloaded_file)
+            return downloaded_file
+        
+        return None
+    
+    def add_metadata(self, file_path, metadata):
         """Add metadata to audio file"""
         try:
-            audio_file = MP4(file_path)
-            
             # Basic metadata
-            audio_file['\xa9nam'] = metadata.get('title', '')  # Title
-            audio_file['\xa9ART'] = metadata.get('artist', '')  # Artist
-            audio_file['\xa9alb'] = metadata.get('album', 'Single')  # Album
-            audio_file['\xa9day'] = metadata.get('year', '')  # Year
-            audio_file['\xa9gen'] = 'Music'  # Genre
+            tags = {
+                '\xa9nam': metadata.get('title', ''),  # Title
+                '\xa9ART': metadata.get('artist', ''),  # Artist
+                '\xa9alb': metadata.get('album', 'Single'),  # Album
+                '\xa9day': metadata.get('year', ''),  # Year
+                '\xa9gen': 'Music',  # Genre
+            }
             
             # Multiple artists
             if metadata.get('artists') and len(metadata['artists']) > 1:
-                audio_file['\xa9ART'] = metadata['artists'][0]  # Main artist
-                audio_file['aART'] = ', '.join(metadata['artists'])  # All artists
+                tags['\xa9ART'] = metadata['artists'][0]  # Main artist
+                tags['aART'] = _join_artists(tuple(metadata['artists']))  # All artists
             
-            # Add cover art
-            if thumbnail_path and thumbnail_path.exists():
-                with open(thumbnail_path, 'rb') as f:
-                    thumbnail_data = f.read()
-                    audio_file['covr'] = [MP4Cover(thumbnail_data, MP4Cover.FORMAT_JPEG)]
+            cover_bytes = metadata.get('thumbnail_bytes')
             
-            audio_file.save()
+            # Fast path: skip files that are already tagged, or patch the tag atoms in place
+            if _write_ilst(file_path, tags, cover_bytes):
+                return
+            
+            # mutagen may rewrite the whole file, which is slow over the network
+            if self.remote_library:
+                self._save_tags_via_local_copy(file_path, tags, cover_bytes)
+            else:
+                self._save_tags(file_path, tags, cover_bytes)
             
         except Exception as e:
-            print(f"⚠️ Error adding metadata: {e}")
+            logger.warning("⚠️ Error adding metadata to %s: %s", file_path, e)
+    
+    def _save_tags(self, file_path, tags, cover_bytes=None):
+        """Write tags with mutagen"""
+        from mutagen.mp4 import MP4, MP4Cover
+        
+        audio_file = MP4(file_path)
+        if audio_file.tags is None:
+            audio_file.add_tags()
+        
+        # Add cover art
+        if cover_bytes:
+            tags['covr'] = [MP4Cover(cover_bytes, MP4Cover.FORMAT_JPEG)]
+        
+        # Write everything at once, reserving free space so later edits stay in place
+        audio_file.tags.update(tags)
+        audio_file.save(padding=lambda info: info.padding if info.padding >= 0 else _TAG_PADDING)
+    
+    def _save_tags_via_local_copy(self, file_path, tags, cover_bytes=None):
+        """Tag a local copy of the file and upload the result once"""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            local_copy = os.path.join(tmp_dir, os.path.basename(file_path))
+            shutil.copyfile(file_path, local_copy)
+            
+            self._save_tags(local_copy, tags, cover_bytes)
+            
+            # os.replace() can't cross filesystems, so stage the upload next to the target
+            staged_copy = f"{file_path}.tagged"
+            shutil.copyfile(local_copy, staged_copy)
+            os.replace(staged_copy, file_path)
 
 def main():
     parser = argparse.ArgumentParser(description='Music downloader with Spotify and Last.fm')
@@ -808,12 +1444,28 @@ def main():
     parser.add_argument('--path', '-p', help='Download path')
     parser.add_argument('--playlist-name', '-n', help='Folder name for playlist')
     parser.add_argument('--extract-only', '-e', action='store_true', help='Only extract Spotify list to file')
+    parser.add_argument('--workers', '--concurrency', '-w', '-j', type=int, default=4, help='Parallel downloads for playlists (default: 4)')
+    parser.add_argument('--remote-lib', action='store_true', help='Download path is a network mount, tag files locally before uploading')
+    parser.add_argument('--quiet', '-q', action='store_true', help='Only show warnings and errors')
     
     args = parser.parse_args()
     
-    downloader = MusicDownloader(download_path=args.path)
+    # Buffer status output and write it to stdout in batches
+    memory_handler = logging.handlers.MemoryHandler(
+        capacity=64,
+        target=logging.StreamHandler(sys.stdout)
+    )
+    logging.basicConfig(level=logging.INFO, format='%(message)s', handlers=[memory_handler])
+    if args.quiet:
+        logger.setLevel(logging.WARNING)
+    
+    downloader = MusicDownloader(
+        download_path=args.path,
+        workers=args.workers,
+        remote_library=args.remote_lib
+    )
     
-    print(f"📁 Download path: {downloader.download_path}")
+    logger.info("📁 Download path: %s", downloader.download_path)
     
     input_type = downloader.detect_input_type(args.query)
     
@@ -826,20 +1478,21 @@ def main():
         )
         
         if results:
-            print(f"\n🎉 Download completed with {len(results)} tracks")
+            logger.info("\n🎉 Download completed with %s tracks", len(results))
         elif not args.extract_only:
-            print("\n💥 Could not download playlist")
+            logger.error("\n💥 Could not download playlist")
     else:
         # It's an individual song
         if args.extract_only:
-            print("⚠️ --extract-only only works with playlists")
+            logger.warning("⚠️ --extract-only only works with playlists")
             return
             
-        result = downloader.download_track(args.query, args.filename)
+        result = downloader.download_track(args.query, downloader.download_path, args.filename)
+        downloader.flush_cache()
         if result:
-            print(f"\n🎵 File saved to: {result}")
+            logger.info("\n🎵 File saved to: %s", result)
         else:
-            print("\n💥 Could not download track")
+            logger.error("\n💥 Could not download track")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file